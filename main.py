@@ -30,6 +30,13 @@ import random
 # Import smtp library for sending emails
 import smtplib
 
+# Threading library for locking the shared report store and value dictionary
+import threading
+
+# Libraries for the bounded report store and report fingerprints
+import collections
+import hashlib
+
 # Set page configurations here
 st.set_page_config(
     page_title="CHRMO-AMS",
@@ -151,7 +158,7 @@ def fetch_last_ten_entries(conn, filter_option="All"):
         last_ten_entries = existing_data.tail(10)
     
     # Replace commas in the "CONTACT NUMBER" column
-    last_ten_entries = last_ten_entries.copy()
+    last_ten_entries = with_current_ages(last_ten_entries)
     last_ten_entries.loc[:, "CONTACT NUMBER"] = last_ten_entries["CONTACT NUMBER"].astype(str).str.replace(',', '')
     
     return last_ten_entries
@@ -176,19 +183,24 @@ def fetch_existing_data(conn):
     # Define the column names to retrieve from Google Sheets
     columns = ["DATE", "DATE SUBMITTED", "NAME", "CONTACT NUMBER", "DESIRED POSITION", 
                "FORWARDED FROM", "ADDRESS", "EDUCATIONAL ATTAINMENT", "CSC ELIGIBILITY", 
-               "AGE", "GENDER", "CURRENT POSITION","TRAINING","EXPERIENCE"]
-
-    # Fetch data from Google Sheets with specified columns
-    existing_data = conn.read(worksheet="Applicants", usecols=columns, ttl=5)
+               "BIRTH DATE", "AGE", "AGE AS OF", "GENDER", "CURRENT POSITION","TRAINING","EXPERIENCE"]
+
+    # Fetch data from Google Sheets and keep the specified columns
+    existing_data = conn.read(worksheet="Applicants", ttl=5)
+    # Sheets that have not been migrated yet have no BIRTH DATE or AGE AS OF column
+    for column in ("BIRTH DATE", "AGE AS OF"):
+        if column not in existing_data.columns:
+            existing_data[column] = None
+    existing_data = existing_data[columns]
     
     # Drop any rows with all NaN values
     existing_data = existing_data.dropna(how="all")
     
     return existing_data
 
-# Function to calculate age from birthday
-def calculate_age(birthday):
-    today = datetime.date.today()
+# Function to calculate age from birthday (as of today unless another date is given)
+def calculate_age(birthday, as_of=None):
+    today = as_of or datetime.date.today()
     age = today.year - birthday.year - ((today.month, today.day) < (birthday.month, birthday.day))
     return age
 
@@ -205,15 +217,77 @@ def parse_date(date_str):
             return None
     except ValueError:
         return None
-                        
+
+# Age brackets used for analytics
+AGE_BRACKETS = [0, 18, 25, 35, 45, 60, 200]
+AGE_BRACKET_LABELS = ["Below 18", "18-24", "25-34", "35-44", "45-59", "60 and above"]
+
+# Pattern of a mm/dd/yyyy date, with or without zero padding
+DATE_PATTERN = r'\d{1,2}/\d{1,2}/\d{4}'
+
+# Parse the mm/dd/yyyy part of a text column into dates (NaT if missing)
+def parse_date_column(column):
+    date_text = column.astype(str).str.extract(f'({DATE_PATTERN})')[0]
+    return pd.to_datetime(date_text, format="%m/%d/%Y", errors="coerce")
+
+# Count the whole years between two columns of dates, same as calculate_age
+def years_between(start_dates, end_dates):
+    before_anniversary = (end_dates.dt.month < start_dates.dt.month) | ((end_dates.dt.month == start_dates.dt.month) & (end_dates.dt.day < start_dates.dt.day))
+    return end_dates.dt.year - start_dates.dt.year - before_anniversary.astype(int)
+
+# Compute the current age of every applicant in one pass. Each age is counted from an
+# anchor date: the birth date when known, otherwise the AGE AS OF date (or the entry DATE
+# for rows not yet migrated) with the stored AGE added on top
+def compute_ages(data):
+    today = pd.Series(pd.Timestamp(datetime.date.today()), index=data.index)
+    birth_dates = parse_date_column(data["BIRTH DATE"])
+    age_dates = parse_date_column(data["AGE AS OF"]).fillna(parse_date_column(data["DATE"])).fillna(today)
+    anchors = birth_dates.fillna(age_dates)
+    base_ages = pd.to_numeric(data["AGE"], errors="coerce").where(birth_dates.isna(), 0)
+    return (base_ages + years_between(anchors, today)).round().astype("Int64")
+
+# Add a CURRENT AGE column next to the stored AGE (the age on the AGE AS OF date) for display
+def with_current_ages(data):
+    data = data.copy()
+    data.insert(data.columns.get_loc("AGE AS OF") + 1, "CURRENT AGE", compute_ages(data))
+    return data
+
+# Group ages into the analytics age brackets
+def age_brackets(ages):
+    return pd.cut(ages.astype(float), bins=AGE_BRACKETS, labels=AGE_BRACKET_LABELS, right=False)
+
+# One-shot migration: move birth dates typed into the AGE column over to BIRTH DATE, and
+# record the entry DATE as the AGE AS OF anchor of every row that only has an age
+def backfill_birth_dates(existing_data):
+    migrated_data = existing_data.copy()
+    # Columns that were written empty are read back as numbers, so hold them as text
+    migrated_data["BIRTH DATE"] = migrated_data["BIRTH DATE"].astype(object)
+    migrated_data["AGE AS OF"] = migrated_data["AGE AS OF"].astype(object)
+    age_text = migrated_data["AGE"].astype(str).str.strip()
+    birth_dates = pd.to_datetime(age_text.where(age_text.str.fullmatch(DATE_PATTERN)), format="%m/%d/%Y", errors="coerce")
+    missing_birth_date = migrated_data["BIRTH DATE"].isna() | migrated_data["BIRTH DATE"].astype(str).str.strip().eq("")
+    missing_age_date = migrated_data["AGE AS OF"].isna() | migrated_data["AGE AS OF"].astype(str).str.strip().eq("")
+    entry_dates = parse_date_column(migrated_data["DATE"])
+    # Birth dates typed into AGE: keep AGE as the age at the entry DATE
+    move_birth_date = birth_dates.notna() & missing_birth_date
+    migrated_data.loc[move_birth_date, "BIRTH DATE"] = birth_dates[move_birth_date].dt.strftime("%m/%d/%Y")
+    ages_at_entry = years_between(birth_dates, entry_dates.fillna(pd.Timestamp(datetime.date.today())))
+    migrated_data.loc[move_birth_date, "AGE"] = ages_at_entry[move_birth_date].astype(int)
+    # Every age is measured at the entry DATE
+    anchor_age = missing_age_date & entry_dates.notna() & pd.to_numeric(migrated_data["AGE"], errors="coerce").notna()
+    migrated_data.loc[anchor_age, "AGE AS OF"] = entry_dates[anchor_age].dt.strftime("%m/%d/%Y")
+    return migrated_data, int(move_birth_date.sum()), int((anchor_age & ~move_birth_date).sum())
+
 # Arrage the new data into a dataframe
 def create_applicant_dataframe(date, date_submitted, name, contact_number, desired_position, forwarded_from,
                                address, educational_attainment, csc_eligibility, birthday_or_age, gender,
                                current_pos, online_submission, training, experience):
     # Determine if the input is a valid date string in the format "MM/DD/YYYY"
     birthday = parse_date(birthday_or_age)
-    if birthday:  # If it's a valid date string, calculate age
-        age = calculate_age(birthday)
+    birth_date = ""
+    if birthday:  # If it's a valid date string, keep it and calculate the age at the entry date
+        birth_date = birthday.strftime("%m/%d/%Y")
+        age = calculate_age(birthday, date)
     else:  # Otherwise, assume it's an age
         try:
             age = int(birthday_or_age)
@@ -234,7 +308,9 @@ def create_applicant_dataframe(date, date_submitted, name, contact_number, desir
         "ADDRESS": [address],
         "EDUCATIONAL ATTAINMENT": [educational_attainment],
         "CSC ELIGIBILITY": [csc_eligibility],
+        "BIRTH DATE": [birth_date],
         "AGE": [age],
+        "AGE AS OF": [date.strftime("%m/%d/%Y")],
         "GENDER": [gender],
         "CURRENT POSITION": [current_pos],
         "TRAINING":[training],
@@ -242,27 +318,355 @@ def create_applicant_dataframe(date, date_submitted, name, contact_number, desir
     }
     return pd.DataFrame(applicant_data)
 
+# Report materializer settings
+REPORT_MAX_DAYS = 62  # Daily reports kept in the store before the least recently used is dropped
+REPORT_MAX_YEARS = 10  # Yearly reports kept in the store before the least recently used is dropped
+REPORT_TIME_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+# Shared store of ready-to-download reports, kept across reruns and users
+@st.cache_resource
+def get_report_store():
+    return {"daily": collections.OrderedDict(), "yearly": collections.OrderedDict(), "lock": threading.Lock()}
+
+# Get the zero-padded mm/dd/yyyy part of a DATE entry (without the online indicator)
+def entry_day(date_text):
+    match = re.search(DATE_PATTERN, str(date_text))
+    if match:
+        try:
+            return datetime.datetime.strptime(match.group(0), "%m/%d/%Y").strftime("%m/%d/%Y")
+        except ValueError:
+            return None
+    return None
+
+# Get the day and year report partitions touched by the given DATE entries
+def report_partitions(date_entries):
+    days = {entry_day(date_text) for date_text in date_entries} - {None}
+    years = {int(day[-4:]) for day in days}
+    return days, years
+
+# Select the rows of a daily report partition
+def daily_rows(existing_data, day_text):
+    return existing_data[parse_date_column(existing_data["DATE"]).dt.strftime("%m/%d/%Y") == day_text]
+
+# Select the rows of a yearly report partition
+def yearly_rows(existing_data, year):
+    return existing_data[existing_data["DATE"].str.contains(str(year), na=False)]
+
+# Cheap fingerprint of the rows in a report partition, used to detect changes
+def partition_fingerprint(rows):
+    row_hashes = pd.util.hash_pandas_object(rows.astype(str), index=False)
+    return hashlib.sha1(row_hashes.to_numpy().tobytes()).hexdigest()
+
+# Package report data with its CSV download, the time it was refreshed and its source fingerprint
+def make_report_artifact(data, refreshed, fingerprint):
+    csv = data.to_csv(index=False)
+    return {
+        "data": data,
+        "csv": base64.b64encode(csv.encode()).decode(),
+        "refreshed": refreshed,
+        "fingerprint": fingerprint
+    }
+
+# Build the per-day report (with REMARKS and row numbers) for every filter
+def build_daily_report(existing_data, day_text):
+    day_data = daily_rows(existing_data, day_text)
+    fingerprint = partition_fingerprint(day_data)
+    online = day_data["DATE"].str.contains("ONLINE", na=False)
+    selections = {
+        "All": day_data,
+        "Walk-in": day_data[~online],
+        "Online": day_data[online]
+    }
+    refreshed = datetime.datetime.now()
+    report = {"fingerprint": fingerprint}
+    for filter_option, search_results_date in selections.items():
+        if not search_results_date.empty:
+            # Create a copy of the DataFrame before modifying it
+            search_results_date = search_results_date.copy()
+            # Remove the personal detail columns
+            search_results_date = search_results_date.drop(columns=["BIRTH DATE", "AGE", "AGE AS OF", "GENDER", "CURRENT POSITION", "TRAINING", "EXPERIENCE"])
+            # Add a new column for REMARKS with default value
+            search_results_date["REMARKS"] = ""
+            # Convert 'CONTACT NUMBER' column to string and then replace commas
+            search_results_date.loc[:, "CONTACT NUMBER"] = search_results_date["CONTACT NUMBER"].astype(str).str.replace(',', '')
+            # Add a new column for row numbering
+            search_results_date.insert(0, ' ', range(1, len(search_results_date) + 1))
+        report[filter_option] = make_report_artifact(search_results_date, refreshed, fingerprint)
+    return report
+
+# Build the applicant summary report for a year
+def build_yearly_report(existing_data, year):
+    search_results_year = yearly_rows(existing_data, year)
+    fingerprint = partition_fingerprint(search_results_year)
+    if not search_results_year.empty:
+        search_results_year = with_current_ages(search_results_year)
+        search_results_year.loc[:, "CONTACT NUMBER"] = search_results_year["CONTACT NUMBER"].astype(str).str.replace(',', '')
+    return make_report_artifact(search_results_year, datetime.datetime.now(), fingerprint)
+
+# Keep a stored report as most recently used and drop the oldest beyond the limit
+def store_report(reports, key, report, limit):
+    reports[key] = report
+    reports.move_to_end(key)
+    while len(reports) > limit:
+        reports.popitem(last=False)
+
+# Rebuild only the stored day and year reports affected by a change
+def materialize_reports(existing_data, days=(), years=()):
+    store = get_report_store()
+    with store["lock"]:
+        for day in days:
+            store_report(store["daily"], day, build_daily_report(existing_data, day), REPORT_MAX_DAYS)
+        for year in years:
+            store_report(store["yearly"], year, build_yearly_report(existing_data, year), REPORT_MAX_YEARS)
+
+# Get a stored report if it still matches the current partition rows
+def lookup_report(reports, key, fingerprint, lock):
+    with lock:
+        report = reports.get(key)
+        if report is None:
+            return None
+        reports.move_to_end(key)
+    if report["fingerprint"] != fingerprint:
+        return None
+    return report
+
+# Serve the stored daily report, rebuilding it if the day's rows have changed
+def get_daily_report(existing_data, day_text, filter_option):
+    store = get_report_store()
+    fingerprint = partition_fingerprint(daily_rows(existing_data, day_text))
+    report = lookup_report(store["daily"], day_text, fingerprint, store["lock"])
+    if report is None:
+        materialize_reports(existing_data, days=[day_text])
+        report = store["daily"][day_text]
+    return report[filter_option]
+
+# Serve the stored yearly report, rebuilding it if the year's rows have changed
+def get_yearly_report(existing_data, year):
+    store = get_report_store()
+    fingerprint = partition_fingerprint(yearly_rows(existing_data, year))
+    report = lookup_report(store["yearly"], year, fingerprint, store["lock"])
+    if report is None:
+        materialize_reports(existing_data, years=[year])
+        report = store["yearly"][year]
+    return report
+
+# Entry form fields whose values are kept in the value dictionary
+SUGGESTION_COLUMNS = ["DESIRED POSITION", "ADDRESS", "FORWARDED FROM", "EDUCATIONAL ATTAINMENT", "CSC ELIGIBILITY"]
+SUGGESTION_LIMIT = 200  # Most frequent values offered by a suggestion field
+SUGGESTION_LOOKUP_LIMIT = 20  # Values listed by the type-ahead lookup
+SUGGESTION_PREFIX_LENGTH = 3  # Leading characters of each normalized value kept in the prefix index
+SUGGESTION_MAX_AGE = 600  # Seconds before the dictionary is resynced from the sheet
+
+# Entry form fields with suggestions: label -> (sheet column, form widget key)
+ENTRY_SUGGESTION_FIELDS = {
+    "Desired Position": ("DESIRED POSITION", "entry_desired_position"),
+    "Address": ("ADDRESS", "entry_address"),
+    "Forwarded From": ("FORWARDED FROM", "entry_forwarded_from"),
+    "Educational Attainment": ("EDUCATIONAL ATTAINMENT", "entry_educational_attainment"),
+    "CSC Eligibility": ("CSC ELIGIBILITY", "entry_csc_eligibility")
+}
+
+# Shared dictionary of distinct field values: frequencies of each spelling and of each
+# normalized value, the spellings of each normalized value, and a prefix index over them
+@st.cache_resource
+def get_value_dictionary():
+    return {"refreshed": None, "counts": {}, "key_counts": {}, "spellings": {}, "prefixes": {},
+            "ranked": {}, "sorted": {}, "lock": threading.Lock()}
+
+# Normalize a value for matching (single spaced and upper case, keeping line breaks)
+def normalize_value(value):
+    lines = str(value).strip().splitlines()
+    return "\n".join(" ".join(line.split()) for line in lines).upper()
+
+# Get a cell value as text, or None if it is blank
+def clean_value(value):
+    if pd.isna(value) or str(value).strip() in ("", "nan"):
+        return None
+    return str(value)
+
+# Add the values of the given rows to the dictionary (a negative count removes them)
+def update_value_dictionary(dictionary, data, count=1):
+    for column in SUGGESTION_COLUMNS:
+        if column not in data.columns:
+            continue
+        counts = dictionary["counts"].setdefault(column, {})
+        key_counts = dictionary["key_counts"].setdefault(column, {})
+        spellings = dictionary["spellings"].setdefault(column, {})
+        prefixes = dictionary["prefixes"].setdefault(column, {})
+        for value, frequency in data[column].map(clean_value).dropna().value_counts().items():
+            key = normalize_value(value)
+            counts[value] = counts.get(value, 0) + frequency * count
+            key_counts[key] = key_counts.get(key, 0) + frequency * count
+            if counts[value] > 0:
+                spellings.setdefault(key, set()).add(value)
+            else:
+                del counts[value]
+                spellings.get(key, set()).discard(value)
+            for length in range(1, min(len(key), SUGGESTION_PREFIX_LENGTH) + 1):
+                if key_counts[key] > 0:
+                    prefixes.setdefault(key[:length], set()).add(key)
+                else:
+                    prefixes.get(key[:length], set()).discard(key)
+            if key_counts[key] <= 0:
+                del key_counts[key]
+                spellings.pop(key, None)
+        # Ranked and alphabetical lists are rebuilt on their next use
+        dictionary["ranked"].pop(column, None)
+        dictionary["sorted"].pop(column, None)
+
+# Build the value dictionary from the sheet data, resyncing it on schedule
+def load_value_dictionary(existing_data):
+    dictionary = get_value_dictionary()
+    with dictionary["lock"]:
+        refreshed = dictionary["refreshed"]
+        if refreshed is None or (datetime.datetime.now() - refreshed).total_seconds() > SUGGESTION_MAX_AGE:
+            for part in ("counts", "key_counts", "spellings", "prefixes", "ranked", "sorted"):
+                dictionary[part].clear()
+            update_value_dictionary(dictionary, existing_data)
+            dictionary["refreshed"] = datetime.datetime.now()
+
+# Update the value dictionary incrementally after a write
+def record_values(data, count=1):
+    dictionary = get_value_dictionary()
+    with dictionary["lock"]:
+        # An unloaded dictionary picks the write up when it is first built
+        if dictionary["refreshed"] is not None:
+            update_value_dictionary(dictionary, data, count)
+
+# Get the most common spelling of a normalized value (dictionary lock must be held)
+def best_spelling(dictionary, column, key):
+    counts = dictionary["counts"].get(column, {})
+    return max(dictionary["spellings"][column][key], key=lambda spelling: (counts.get(spelling, 0), spelling))
+
+# Get one spelling per distinct value of a field that starts with the prefix, most frequent first
+def suggest_values(column, prefix="", limit=None):
+    dictionary = get_value_dictionary()
+    prefix_key = normalize_value(prefix)
+    with dictionary["lock"]:
+        key_counts = dictionary["key_counts"].get(column, {})
+        if prefix_key:
+            keys = dictionary["prefixes"].get(column, {}).get(prefix_key[:SUGGESTION_PREFIX_LENGTH], set())
+            keys = sorted((key for key in keys if key.startswith(prefix_key)), key=lambda key: (-key_counts[key], key))
+        else:
+            if column not in dictionary["ranked"]:
+                dictionary["ranked"][column] = sorted(key_counts, key=lambda key: (-key_counts[key], key))
+            keys = dictionary["ranked"][column]
+        if limit:
+            keys = keys[:limit]
+        return [best_spelling(dictionary, column, key) for key in keys]
+
+# Get the distinct values of a field in alphabetical order
+def sorted_values(column):
+    dictionary = get_value_dictionary()
+    with dictionary["lock"]:
+        if column not in dictionary["sorted"]:
+            dictionary["sorted"][column] = sorted(dictionary["counts"].get(column, {}))
+        return dictionary["sorted"][column]
+
+# Match an entered value to its most common existing spelling
+def canonical_value(column, value):
+    value = clean_value(value)
+    if value is None:
+        return ""
+    dictionary = get_value_dictionary()
+    key = normalize_value(value)
+    with dictionary["lock"]:
+        if key in dictionary["spellings"].get(column, {}):
+            return best_spelling(dictionary, column, key)
+    return value.strip()
+
+# Free-text field for the entry form with the most frequent existing entries as suggestions
+def suggestion_input(label, column, key, help=None, default=None):
+    # The default (or a value filled in by the lookup) is kept in session state
+    if default and key not in st.session_state:
+        st.session_state[key] = default
+    options = suggest_values(column, limit=SUGGESTION_LIMIT)
+    selected = st.session_state.get(key)
+    if selected and selected not in options:
+        options = [selected] + options
+    return st.selectbox(label=label, options=options, index=None, help=help, placeholder="Type or select",
+                        accept_new_options=True, key=key)
+
+# Type-ahead lookup of existing entries that fills the matching entry form field
+@st.fragment
+def show_value_lookup():
+    with st.expander("🔎 Look up existing entries"):
+        col1, col2 = st.columns(2)
+        with col1:
+            field = st.selectbox("Field", list(ENTRY_SUGGESTION_FIELDS), key="lookup_field")
+        with col2:
+            prefix = st.text_input("Starts with (press 'enter' to search)", key="lookup_prefix")
+        column, key = ENTRY_SUGGESTION_FIELDS[field]
+        if prefix:
+            suggestions = suggest_values(column, prefix, limit=SUGGESTION_LOOKUP_LIMIT)
+            if suggestions:
+                choice = st.radio("Existing entries (most frequent first)", suggestions, key="lookup_choice")
+                if st.button("Use in form", key="lookup_use", help=f"Fill the {field} field with this entry."):
+                    st.session_state[key] = choice
+                    st.rerun()
+            else:
+                st.info(f"No existing entries start with '{prefix}'")
+
+# Split the differences between two versions of the data into removed and added rows
+def changed_rows(old_data, new_data):
+    columns = list(new_data.columns)
+    old_rows = old_data.reindex(columns=columns).astype(str)
+    new_rows = new_data.astype(str)
+    # Number repeated rows so duplicates are matched one-to-one
+    old_rows["_OCCURRENCE"] = old_rows.groupby(columns).cumcount()
+    new_rows["_OCCURRENCE"] = new_rows.groupby(columns).cumcount()
+    merged = old_rows.merge(new_rows, how="outer", indicator=True)
+    removed = merged[merged["_merge"] == "left_only"][columns]
+    added = merged[merged["_merge"] == "right_only"][columns]
+    return removed, added
+
+# Chart payload limits
+CHART_TOP_N = 15  # Categories shown before the rest are grouped into "Other"
+CHART_MAX_POINTS = 366  # Points allowed in the time chart before counts are resampled
+CHART_WEBGL_POINTS = 250  # Points above which line traces are drawn with WebGL
+
+# Replace every value outside the n most frequent with "Other" (blanks are kept)
+def bucket_top_n(values, n=CHART_TOP_N):
+    top_values = values.value_counts().head(n).index
+    return values.where(values.isin(top_values) | values.isna(), "Other")
+
+# Count applicants per day, week or month depending on the span of the dates
+def resample_applicant_counts(data):
+    span = (data['DATE'].max() - data['DATE'].min()).days if not data.empty else 0
+    if span < CHART_MAX_POINTS:
+        rule, period = "D", "Day"
+    elif span < CHART_MAX_POINTS * 7:
+        rule, period = "W", "Week"
+    else:
+        rule, period = "MS", "Month"
+    applicants_count = data.set_index('DATE').resample(rule).size().reset_index(name='Applicants')
+    return applicants_count, period
+
 def show_applicants_chart(existing_data):
+    # Group current ages into brackets before the 'DATE' column is converted
+    existing_data['AGE BRACKET'] = age_brackets(compute_ages(existing_data))
+
     # Convert the 'DATE' column to datetime format
     existing_data['DATE'] = pd.to_datetime(existing_data['DATE'].str.replace(r'\s*\(ONLINE\)', '', regex=True), errors='coerce', format='%m/%d/%Y')
     
     # Remove any rows with missing dates
     existing_data.dropna(subset=['DATE'], inplace=True)
     
-    # Group the data by date and count the number of applicants for each date
-    applicants_count = existing_data.groupby('DATE').size().reset_index(name='Applicants')
+    # Count the number of applicants per day, week or month depending on the date span
+    applicants_count, period = resample_applicant_counts(existing_data)
     st.title("Number of Applicants Over Time")
     
-    # Create a line chart using Plotly
-    fig = px.line(applicants_count, x='DATE', y='Applicants')
-    fig.update_xaxes(title='Date')
+    # Create a line chart using Plotly (WebGL for long series)
+    render_mode = "webgl" if len(applicants_count) > CHART_WEBGL_POINTS else "svg"
+    fig = px.line(applicants_count, x='DATE', y='Applicants', render_mode=render_mode)
+    fig.update_xaxes(title=period)
     fig.update_yaxes(title='Number of Applicants')
     
     # Show the chart
     st.plotly_chart(fig, use_container_width=True)
 
-    # Group the data by address and count the number of applicants for each address
-    address_counts = existing_data['ADDRESS'].value_counts()
+    # Group the data by address and count the number of applicants for the top addresses
+    address_counts = bucket_top_n(existing_data['ADDRESS']).value_counts()
     
     # Create a pie chart using Plotly for distribution of applicants by address
     fig_pie_chart = px.pie(address_counts, values=address_counts.values, names=address_counts.index, title='Applicants Distribution by Address')
@@ -270,8 +674,8 @@ def show_applicants_chart(existing_data):
     # Show the pie chart
     st.plotly_chart(fig_pie_chart, use_container_width=True)
 
-    # Group the data by desired position and count the number of applicants for each position
-    position_counts = existing_data['DESIRED POSITION'].value_counts()
+    # Group the data by desired position and count the number of applicants for the top positions
+    position_counts = bucket_top_n(existing_data['DESIRED POSITION']).value_counts()
     
     # Create a bar chart using Plotly for distribution of applicants by desired position
     fig_bar_chart = px.bar(position_counts, x=position_counts.index, y=position_counts.values, title='Applicants Distribution by Desired Position')
@@ -281,8 +685,19 @@ def show_applicants_chart(existing_data):
     # Show the bar chart
     st.plotly_chart(fig_bar_chart, use_container_width= True)
 
-    # Group the data by desired position and educational attainment and count the number of applicants for each combination
-    position_education_counts = existing_data.groupby(['DESIRED POSITION', 'EDUCATIONAL ATTAINMENT']).size().reset_index(name='Count')
+    # Count the number of applicants in each age bracket
+    age_bracket_counts = existing_data['AGE BRACKET'].value_counts(sort=False)
+
+    # Create a bar chart using Plotly for distribution of applicants by age bracket
+    fig_age_chart = px.bar(age_bracket_counts, x=age_bracket_counts.index.astype(str), y=age_bracket_counts.values, title='Applicants Distribution by Age Bracket')
+    fig_age_chart.update_xaxes(title='Age')
+    fig_age_chart.update_yaxes(title='Number of Applicants')
+
+    # Show the age bracket chart
+    st.plotly_chart(fig_age_chart, use_container_width=True)
+
+    # Group the data by the top desired positions and educational attainments and count the number of applicants for each combination
+    position_education_counts = existing_data.groupby([bucket_top_n(existing_data['DESIRED POSITION']), bucket_top_n(existing_data['EDUCATIONAL ATTAINMENT'])]).size().reset_index(name='Count')
     
     # Create a grouped bar chart using Plotly for relationship between desired position and educational attainments
     fig_grouped_bar_chart = px.bar(position_education_counts, x='DESIRED POSITION', y='Count', color='EDUCATIONAL ATTAINMENT', barmode='group', title='Relationship between Desired Position and Educational Attainments')
@@ -323,6 +738,13 @@ def edit_data():
             if save_button:
                 # Update the original dataset with the edited data
                 update_google_sheet(conn, edited_data)
+                # Rebuild the reports for the days and years that were edited
+                removed, added = changed_rows(existing_data, edited_data)
+                days, years = report_partitions(pd.concat([removed["DATE"], added["DATE"]]))
+                materialize_reports(edited_data, days, years)
+                # Update the suggestions with the edited values
+                record_values(removed, count=-1)
+                record_values(added)
                 st.success("Data updated successfully!")
                 refresh("Data updated.")
         with col2:
@@ -355,6 +777,22 @@ def main_content():
             ref_button = st.button(label="Refresh Web Application", help="Refresh the web application to update data")
             if ref_button:
                 st.rerun()
+
+            # Age migration button
+            migrate_button = st.button(label="Migrate Ages", help="One-time update that adds the BIRTH DATE and AGE AS OF columns to the Google Sheet, moves birth dates entered in the AGE column into BIRTH DATE, and records the entry date as the AGE AS OF date of every age.")
+            if migrate_button:
+                conn = st.connection("gsheets", type=GSheetsConnection, ttl=5)
+                migrated_data, birth_date_rows, age_rows = backfill_birth_dates(fetch_existing_data(conn))
+                update_google_sheet(conn, migrated_data)
+                get_report_store.clear()
+                refresh(f"Birth dates moved for {birth_date_rows} entries and ages dated for {age_rows} entries.")
+
+            # Rebuild reports and suggestions button
+            reports_button = st.button(label="Rebuild Reports and Suggestions", help="Discard the stored reports and field suggestions so they are rebuilt from the Google Sheet.")
+            if reports_button:
+                get_report_store.clear()
+                get_value_dictionary.clear()
+                refresh("Reports and suggestions will be rebuilt.")
         with c2:
             # Open Google Sheet button
             st.link_button(label="Open Google Sheet", help="Open the Google Sheet", type="primary", url="https://docs.google.com/spreadsheets/d/1hmxu-9cIt3X8IP3OhhZRjJt_NHHqQSzjwqcEOvLadHw")
@@ -375,9 +813,12 @@ def main_content():
     else:
         st.markdown("**:green[Connected to the Google Sheet.]**")
         existing_data = fetch_existing_data(conn)  # Initially get all of the current data from the sheet
+        load_value_dictionary(existing_data)  # Build or resync the field suggestions
         tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["✍️ **Enter New Applicant**","🔎 **Search**","📑 **History**","📈 **Analytics**","💬 **Feedback**","✏️ **Edit Data**"])
     # Enter Applicant Tab
         with tab1:
+            # Look up existing spellings to fill the form fields
+            show_value_lookup()
             # Display form for entering new applicant information
             with st.form(key="Applicants", clear_on_submit=True, border=True):
                 st.markdown(':red[**Fields marked with ( * ) are required**], and please use **_Caps Lock_** when entering info.')
@@ -391,8 +832,8 @@ def main_content():
                 with col1: # Left column
                     date = st.date_input(label="Date*", help="Select Date.", format="MM/DD/YYYY")
                     name = st.text_input(label="Name of Applicant*", help="Full Name")
-                    desired_position = st.text_input(label="Desired Position", help="'ANY VACANT POSITION' if not provided.", autocomplete="ANY VACANT POSITION")
-                    address = st.text_input(label="Address")
+                    desired_position = suggestion_input(label="Desired Position", column="DESIRED POSITION", key="entry_desired_position", help="'ANY VACANT POSITION' if not provided.")
+                    address = suggestion_input(label="Address", column="ADDRESS", key="entry_address")
                     birthday_or_age = st.text_input(label="Date of Birth or Age", help="Enter Birthday in MM/DD/YYYY format or Age directly", placeholder="Enter date of birth (mm/dd/yyy) or age")
                     gender = st.selectbox(label="Gender", options=["MALE", "FEMALE", "OTHER"], index=None, placeholder="Select Gender")
                     training = st.text_area(label="Training", help="Indicate training undergone by the applicant, leave blank if N/A")
@@ -401,18 +842,27 @@ def main_content():
                 with col2: # Right column
                     date_submitted = st.date_input(label="Date Submitted*", help="Select Date Submitted", value=None, format="MM/DD/YYYY")
                     contact_number = st.text_input(label="Contact Number", help="Numeric only", max_chars=11)
-                    forwarded_from = st.text_input(label="Forwarded From", help="CHRMO", autocomplete = "CHRMO", value="CHRMO")
-                    educational_attainment = st.text_area(label="Educational Attainment")
-                    csc_eligibility = st.text_area(label="CSC Eligibility", help="Leave blank if N/A")
+                    forwarded_from = suggestion_input(label="Forwarded From", column="FORWARDED FROM", key="entry_forwarded_from", help="CHRMO", default="CHRMO")
+                    educational_attainment = st.text_area(label="Educational Attainment", help="Use 'Look up existing entries' above to reuse an existing entry.", key="entry_educational_attainment")
+                    csc_eligibility = st.text_area(label="CSC Eligibility", help="Leave blank if N/A. Use 'Look up existing entries' above to reuse an existing entry.", key="entry_csc_eligibility")
                     current_pos = st.text_input(label="Current Position", help="leave blank if N/A")
 
                 st.divider()
                 # Submit data button    
                 submit_button = st.form_submit_button(label="**Submit Data**", type="primary")
                 if submit_button:
+                    # Let the suggestion fields start from their defaults once the form clears
+                    for column, key in ENTRY_SUGGESTION_FIELDS.values():
+                        st.session_state.pop(key, None)
                     if not all([date, date_submitted, name]):  # Check required fields
                         st.error("Please fill in all required fields.")
                     else:
+                        # Use the existing spelling of the free-text values
+                        desired_position = canonical_value("DESIRED POSITION", desired_position)
+                        address = canonical_value("ADDRESS", address)
+                        forwarded_from = canonical_value("FORWARDED FROM", forwarded_from)
+                        educational_attainment = canonical_value("EDUCATIONAL ATTAINMENT", educational_attainment)
+                        csc_eligibility = canonical_value("CSC ELIGIBILITY", csc_eligibility)
                         # Prepare the dataframe to send to google sheets
                         new_applicant_df = create_applicant_dataframe(date, date_submitted, name, contact_number,
                                                                     desired_position, forwarded_from, address,
@@ -422,6 +872,11 @@ def main_content():
                         # Append the data to the google sheet
                         updated_df = pd.concat([existing_data, new_applicant_df], ignore_index=True)
                         update_google_sheet(conn, updated_df)
+                        # Rebuild the reports for the day and year of the new entry
+                        days, years = report_partitions(new_applicant_df["DATE"])
+                        materialize_reports(updated_df, days, years)
+                        # Add the new values to the suggestions
+                        record_values(new_applicant_df)
                         st.success("Data Successfully Submitted.")
                         refresh("Data updated.")
 
@@ -433,8 +888,8 @@ def main_content():
                 if search_name:
                     search_results_name = existing_data[existing_data["NAME"].str.contains(search_name, case=False, na=False)]
                     if not search_results_name.empty:
-                        # Create a copy of the DataFrame before modifying it
-                        search_results_name = search_results_name.copy()
+                        # Create a copy of the DataFrame with current ages before modifying it
+                        search_results_name = with_current_ages(search_results_name)
                         search_results_name.loc[:, "CONTACT NUMBER"] = search_results_name["CONTACT NUMBER"].astype(str).str.replace(',', '')
                         st.subheader(f"Search Results for '{search_name}'")
                         st.dataframe(search_results_name,use_container_width=True,hide_index=True)
@@ -445,33 +900,18 @@ def main_content():
                 search_date = st.date_input("Select a date", key="date_input")
                 if search_date:
                     filter_options = st.radio("Filter:", ("All", "Walk-in", "Online"), index=0, key="datefilter")
-                    if filter_options == "All":
-                        search_results_date = existing_data[existing_data["DATE"].str.contains(search_date.strftime('%m/%d/%Y'), case=False, na=False)]
-                    elif filter_options == "Walk-in":
-                        search_results_date = existing_data[(existing_data["DATE"].str.contains(search_date.strftime('%m/%d/%Y'), case=False, na=False)) & (~existing_data["DATE"].str.contains("ONLINE"))]
-                    else:
-                        search_results_date = existing_data[(existing_data["DATE"].str.contains(search_date.strftime('%m/%d/%Y'), case=False, na=False)) & (existing_data["DATE"].str.contains("ONLINE"))]
+                    daily_report = get_daily_report(existing_data, search_date.strftime('%m/%d/%Y'), filter_options)
+                    search_results_date = daily_report["data"]
                     
                     if not search_results_date.empty:
-                        # Create a copy of the DataFrame before modifying it
-                        search_results_date = search_results_date.copy()
-                        # Remove the last two columns
-                        search_results_date = search_results_date.iloc[:, :-5]
-                        # Add a new column for REMARKS with default value
-                        search_results_date["REMARKS"] = ""
-                        # Convert 'CONTACT NUMBER' column to string and then replace commas
-                        search_results_date.loc[:, "CONTACT NUMBER"] = search_results_date["CONTACT NUMBER"].astype(str).str.replace(',', '')
-                        # Add a new column for row numbering
-                        search_results_date.insert(0, ' ', range(1, len(search_results_date) + 1))
                         st.subheader(f"Search Results for '{search_date.strftime('%m/%d/%Y')}'")
                         st.dataframe(search_results_date,use_container_width=True,hide_index=True)
 
                         # Download button
-                        csv = search_results_date.to_csv(index=False)
-                        b64 = base64.b64encode(csv.encode()).decode()
                         file_name = f"{search_date.strftime('%m-%d-%Y')}.csv"
-                        href = f'<a href="data:file/csv;base64,{b64}" download="{file_name}">Download Report</a>'
+                        href = f'<a href="data:file/csv;base64,{daily_report["csv"]}" download="{file_name}">Download Report</a>'
                         st.markdown(href, unsafe_allow_html=True)
+                        st.caption(f"Report last refreshed: {daily_report['refreshed'].strftime(REPORT_TIME_FORMAT)}")
                     else:
                         st.info(f"No results found for '{search_date.strftime('%m/%d/%Y')}'")
 
@@ -494,8 +934,8 @@ def main_content():
                     search_results_datesub = existing_data[(existing_data['DATE SUBMITTED'] >= start_date_datetime) & (existing_data['DATE SUBMITTED'] <= end_date_datetime)]
 
                     if not search_results_datesub.empty:
-                        # Create a copy of the DataFrame before modifying it
-                        search_results_datesub = search_results_datesub.copy()
+                        # Create a copy of the DataFrame with current ages before modifying it
+                        search_results_datesub = with_current_ages(search_results_datesub)
 
                         # Convert 'CONTACT NUMBER' column to string and then replace commas
                         search_results_datesub['CONTACT NUMBER'] = search_results_datesub['CONTACT NUMBER'].astype(str).str.replace(',', '')
@@ -521,12 +961,12 @@ def main_content():
                     st.info("Please enter a date range.")
 
             if searchtype == "Desired Position":
-                unique_desired_positions = sorted(existing_data["DESIRED POSITION"].astype(str).unique().tolist())
+                unique_desired_positions = sorted_values("DESIRED POSITION")
                 desired_position_input = st.selectbox("Select Desired Position", unique_desired_positions, index = None)
                 if desired_position_input:
                     search_results_position = existing_data[existing_data["DESIRED POSITION"].astype(str) == desired_position_input]
                     if not search_results_position.empty:
-                        search_results_position = search_results_position.copy()
+                        search_results_position = with_current_ages(search_results_position)
                         search_results_position.loc[:, "CONTACT NUMBER"] = search_results_position["CONTACT NUMBER"].astype(str).str.replace(',', '')
                         st.subheader(f"Search Results for Desired Position '{desired_position_input}'")
                         st.dataframe(search_results_position,use_container_width=True,hide_index=True)
@@ -543,23 +983,18 @@ def main_content():
             if searchtype == "Year":
                 year_input = st.number_input("Search by Year", min_value=2023, max_value=2050, value=2023, step=1)
                 if year_input:
-                    existing_data = fetch_existing_data(conn)
-
-                    # Filter the data based on the selected year
-                    search_results_year = existing_data[existing_data["DATE"].str.contains(str(year_input), na=False)]
+                    yearly_report = get_yearly_report(existing_data, year_input)
+                    search_results_year = yearly_report["data"]
 
                     if not search_results_year.empty:
-                        search_results_year = search_results_year.copy()
-                        search_results_year.loc[:, "CONTACT NUMBER"] = search_results_year["CONTACT NUMBER"].astype(str).str.replace(',', '')
                         st.subheader(f"Search Results for Year {year_input}")
                         st.dataframe(search_results_year,use_container_width=True,hide_index=True)
 
                         # Download button
-                        csv = search_results_year.to_csv(index=False)
-                        b64 = base64.b64encode(csv.encode()).decode()
                         file_name = f"APPLICANT SUMMARY {year_input}.csv"
-                        href = f'<a href="data:file/csv;base64,{b64}" download="{file_name}">Download Summary</a>'
+                        href = f'<a href="data:file/csv;base64,{yearly_report["csv"]}" download="{file_name}">Download Summary</a>'
                         st.markdown(href, unsafe_allow_html=True)
+                        st.caption(f"Report last refreshed: {yearly_report['refreshed'].strftime(REPORT_TIME_FORMAT)}")
                     else:
                         st.info(f"No results found for year {year_input}")
             